@@ -3,17 +3,33 @@
 MCP wrapper for YouTube Summary functionality.
 """
 
+import asyncio
 import contextlib
 import json
 import sys
-from typing import Dict, Any, List, Optional
+import threading
+from typing import Callable, Dict, Any, List, Optional, Union
+
+import orjson
 from src.youtubesummary.youtube_summary import (
     extract_video_id,
     get_transcript,
-    generate_summary,
-    save_to_markdown
+    agenerate_summary,
+    save_to_markdown_async
 )
 
+# Upper bound on tool calls processed at the same time
+MAX_CONCURRENT_CALLS = 32
+
+
+def json_dumps(obj: Any) -> str:
+    """Serialize to compact JSON with orjson."""
+    try:
+        return orjson.dumps(obj).decode()
+    except TypeError:
+        # orjson rejects integers wider than 64 bits; the stdlib does not
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
 
 @contextlib.contextmanager
 def stdout_to_stderr():
@@ -54,6 +70,11 @@ class MCPWrapper:
                             "type": "boolean",
                             "description": "Whether to save results to file",
                             "default": False
+                        },
+                        "use_cache": {
+                            "type": "boolean",
+                            "description": "Reuse a cached summary for the same transcript and model",
+                            "default": True
                         }
                     },
                     "required": ["url"]
@@ -72,8 +93,13 @@ class MCPWrapper:
             for name, tool in self.tools.items()
         ]
     
-    def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        """Call a tool with given arguments."""
+    async def call_tool(
+        self,
+        name: str,
+        arguments: Dict[str, Any],
+        on_progress: Optional[Callable[[int], None]] = None
+    ) -> Dict[str, Any]:
+        """Call a tool with given arguments, reporting progress to on_progress if given."""
         if name not in self.tools:
             return {
                 "content": [{"type": "text", "text": f"Unknown tool: {name}"}],
@@ -82,7 +108,7 @@ class MCPWrapper:
 
         try:
             if name == "youtube_summary":
-                return self._youtube_summary(arguments)
+                return await self._youtube_summary(arguments, on_progress)
             else:
                 return {
                     "content": [{"type": "text", "text": f"Tool {name} not implemented"}],
@@ -94,12 +120,17 @@ class MCPWrapper:
                 "isError": True
             }
     
-    def _youtube_summary(self, args: Dict[str, Any]) -> Dict[str, Any]:
+    async def _youtube_summary(
+        self,
+        args: Dict[str, Any],
+        on_progress: Optional[Callable[[int], None]] = None
+    ) -> Dict[str, Any]:
         """Generate YouTube video summary."""
         url = args.get("url")
         model = args.get("model", "claude-sonnet-4-20250514")
         output_file = args.get("output_file", "transcript.md")
         save_to_file = args.get("save_to_file", False)
+        use_cache = args.get("use_cache", True)
         
         if not url:
             return {
@@ -107,138 +138,241 @@ class MCPWrapper:
                 "isError": True
             }
 
-        with stdout_to_stderr():
-            # Extract video ID
-            video_id = extract_video_id(url)
-            if not video_id:
-                return {
-                    "content": [{"type": "text", "text": "Invalid YouTube URL or video ID"}],
-                    "isError": True
-                }
+        loop = asyncio.get_running_loop()
 
-            # Get transcript
-            transcript = get_transcript(video_id)
-            if not transcript:
-                return {
-                    "content": [{"type": "text", "text": "Failed to download transcript"}],
-                    "isError": True
-                }
+        # Extract video ID
+        video_id = extract_video_id(url)
+        if not video_id:
+            return {
+                "content": [{"type": "text", "text": "Invalid YouTube URL or video ID"}],
+                "isError": True
+            }
 
-            # Generate summary
-            summary = generate_summary(transcript, model)
-            if not summary:
-                return {
-                    "content": [{"type": "text", "text": "Failed to generate summary"}],
-                    "isError": True
-                }
+        # Get transcript
+        transcript = await loop.run_in_executor(None, get_transcript, video_id)
+        if not transcript:
+            return {
+                "content": [{"type": "text", "text": "Failed to download transcript"}],
+                "isError": True
+            }
 
-            result = {
-                "video_id": video_id,
-                "video_url": url,
-                "transcript": transcript,
-                "summary": summary,
-                "model_used": model
+        # Generate summary
+        on_token = None
+        if on_progress:
+            # Progress is the number of summary characters generated so far
+            generated = 0
+
+            def on_token(text: str) -> None:
+                nonlocal generated
+                generated += len(text)
+                on_progress(generated)
+
+        summary = await agenerate_summary(
+            transcript, model, use_cache=use_cache, on_token=on_token
+        )
+        if not summary:
+            return {
+                "content": [{"type": "text", "text": "Failed to generate summary"}],
+                "isError": True
             }
 
-            # Save to file if requested
-            if save_to_file:
-                success = save_to_markdown(transcript, summary, output_file, url, model)
-                result["saved_to_file"] = success
-                if success:
-                    result["output_file"] = output_file
+        result = {
+            "video_id": video_id,
+            "video_url": url,
+            "transcript": transcript,
+            "summary": summary,
+            "model_used": model
+        }
+
+        # Save to file if requested
+        if save_to_file:
+            success = await save_to_markdown_async(
+                transcript, summary, output_file, url, model
+            )
+            result["saved_to_file"] = success
+            if success:
+                result["output_file"] = output_file
         
         return {
-            "content": [{"type": "text", "text": json.dumps(result, indent=2)}]
+            "content": [{"type": "text", "text": json_dumps(result)}]
         }
 
 
-def main():
-    """Main MCP server loop.""" 
-    wrapper = MCPWrapper()
-    
-    for line in sys.stdin:
-        try:
-            request = json.loads(line.strip())
-            
-            method = request.get("method")
+async def handle_request(
+    wrapper: MCPWrapper,
+    request: Dict[str, Any],
+    notify: Callable[[Dict[str, Any]], None]
+) -> Optional[Dict[str, Any]]:
+    """Build the JSON-RPC response for a single request, sending notifications via notify."""
+    method = request.get("method")
 
-            # Notifications have no "id" and require no response
-            if "id" not in request:
-                continue
+    # Notifications have no "id" and require no response
+    if "id" not in request:
+        return None
 
-            if method == "initialize":
-                response = {
-                    "jsonrpc": "2.0",
-                    "id": request.get("id"),
-                    "result": {
-                        "protocolVersion": "2024-11-05",
-                        "capabilities": {"tools": {}},
-                        "serverInfo": {
-                            "name": "youtube-summary",
-                            "version": "1.0.0"
-                        }
-                    }
+    if method == "initialize":
+        return {
+            "jsonrpc": "2.0",
+            "id": request.get("id"),
+            "result": {
+                "protocolVersion": "2024-11-05",
+                "capabilities": {"tools": {}},
+                "serverInfo": {
+                    "name": "youtube-summary",
+                    "version": "1.0.0"
                 }
+            }
+        }
+
+    elif method == "tools/list":
+        return {
+            "jsonrpc": "2.0",
+            "id": request.get("id"),
+            "result": {
+                "tools": wrapper.list_tools()
+            }
+        }
+
+    elif method == "tools/call":
+        params = request.get("params", {})
+        tool_name = params.get("name")
+        arguments = params.get("arguments", {})
 
-            elif method == "tools/list":
-                response = {
+        # Stream progress while the summary generates if the client asked for it
+        progress_token = params.get("_meta", {}).get("progressToken")
+        on_progress = None
+        if progress_token is not None:
+            def on_progress(progress: int) -> None:
+                notify({
                     "jsonrpc": "2.0",
-                    "id": request.get("id"),
-                    "result": {
-                        "tools": wrapper.list_tools()
+                    "method": "notifications/progress",
+                    "params": {
+                        "progressToken": progress_token,
+                        "progress": progress
                     }
-                }
-            
-            elif method == "tools/call":
-                params = request.get("params", {})
-                tool_name = params.get("name")
-                arguments = params.get("arguments", {})
-                
-                result = wrapper.call_tool(tool_name, arguments)
-                
-                response = {
-                    "jsonrpc": "2.0", 
-                    "id": request.get("id"),
-                    "result": result
-                }
-            
+                })
+
+        result = await wrapper.call_tool(tool_name, arguments, on_progress)
+
+        return {
+            "jsonrpc": "2.0",
+            "id": request.get("id"),
+            "result": result
+        }
+
+    return {
+        "jsonrpc": "2.0",
+        "id": request.get("id"),
+        "error": {
+            "code": -32601,
+            "message": "Method not found"
+        }
+    }
+
+
+async def serve(stdin, stdout):
+    """Read JSON-RPC requests from stdin and answer them concurrently on stdout."""
+    wrapper = MCPWrapper()
+    loop = asyncio.get_running_loop()
+    limit = asyncio.Semaphore(MAX_CONCURRENT_CALLS)
+    pending = set()
+
+    def send(response: Dict[str, Any]) -> None:
+        # Only called from the event loop thread, so each line is written whole.
+        # stdout is line buffered, so the trailing newline flushes it.
+        stdout.write(json_dumps(response) + "\n")
+
+    async def process(request: Dict[str, Any]) -> None:
+        try:
+            # Only tool calls are slow; initialize and tools/list never wait
+            if request.get("method") == "tools/call":
+                async with limit:
+                    response = await handle_request(wrapper, request, send)
             else:
-                response = {
-                    "jsonrpc": "2.0",
-                    "id": request.get("id"),
-                    "error": {
-                        "code": -32601,
-                        "message": "Method not found"
-                    }
+                response = await handle_request(wrapper, request, send)
+        except Exception as e:
+            response = {
+                "jsonrpc": "2.0",
+                "id": request.get("id"),
+                "error": {
+                    "code": -32603,
+                    "message": f"Internal error: {str(e)}"
                 }
-            
-            print(json.dumps(response))
-            sys.stdout.flush()
-            
+            }
+        if response is not None:
+            send(response)
+
+    # stdin is read on its own daemon thread: it never competes with tool work
+    # for executor workers, and it cannot hold up shutdown on Ctrl+C.
+    lines: "asyncio.Queue[Union[str, None, Exception]]" = asyncio.Queue()
+
+    def read_stdin() -> None:
+        # Always finish with None (end of input) or the exception that stopped
+        # reading, so serve() is never left waiting on a dead thread.
+        end: Optional[Exception] = None
+        try:
+            for line in iter(stdin.readline, ""):
+                loop.call_soon_threadsafe(lines.put_nowait, line)
+        except Exception as e:
+            end = e
+        finally:
+            # RuntimeError here means the event loop has already closed
+            with contextlib.suppress(RuntimeError):
+                loop.call_soon_threadsafe(lines.put_nowait, end)
+
+    threading.Thread(target=read_stdin, name="mcp-stdin", daemon=True).start()
+
+    read_error = None
+    while True:
+        line = await lines.get()
+        if line is None:
+            break
+        if isinstance(line, Exception):
+            read_error = line
+            break
+
+        try:
+            request = json.loads(line)
         except json.JSONDecodeError:
-            error_response = {
+            send({
                 "jsonrpc": "2.0",
                 "id": None,
                 "error": {
                     "code": -32700,
                     "message": "Parse error"
                 }
-            }
-            print(json.dumps(error_response))
-            sys.stdout.flush()
-        
-        except Exception as e:
-            error_response = {
+            })
+            continue
+
+        if not isinstance(request, dict):
+            send({
                 "jsonrpc": "2.0",
-                "id": request.get("id") if 'request' in locals() else None,
+                "id": None,
                 "error": {
-                    "code": -32603,
-                    "message": f"Internal error: {str(e)}"
+                    "code": -32600,
+                    "message": "Invalid Request"
                 }
-            }
-            print(json.dumps(error_response))
-            sys.stdout.flush()
+            })
+            continue
+
+        task = asyncio.ensure_future(process(request))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    if pending:
+        await asyncio.gather(*pending)
+    if read_error is not None:
+        raise read_error
+
+
+def main():
+    """Main MCP server loop."""
+    sys.stdout.reconfigure(encoding="utf-8", line_buffering=True)
+    stdout = sys.stdout
+    # Tool code reports progress with print(); keep that off the protocol stream
+    with stdout_to_stderr():
+        asyncio.run(serve(sys.stdin, stdout))
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
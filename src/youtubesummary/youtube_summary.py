@@ -6,14 +6,72 @@ Downloads YouTube video transcripts and generates AI-powered summaries.
 """
 
 import argparse
+import asyncio
+import contextlib
+import hashlib
 import os
 import sys
 import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 from pathlib import Path
 from urllib.parse import urlparse, parse_qs
+import requests
 from youtube_transcript_api import YouTubeTranscriptApi
-import litellm
-from litellm import completion
+
+# litellm takes a long time to import, so it is loaded on first use
+_litellm = None
+
+# Summaries are cached on disk so repeat requests for the same transcript skip the LLM
+SUMMARY_CACHE_PATH = Path(
+    os.environ.get(
+        "YOUTUBE_SUMMARY_CACHE",
+        Path.home() / ".cache" / "youtubesummary" / "summaries.db",
+    )
+)
+SUMMARY_CACHE_TTL = 7 * 24 * 60 * 60  # seconds
+
+# Transcript clients live as long as their thread so YouTube connections stay
+# alive; requests.Session is not guaranteed thread-safe, so none is shared.
+_transcript_clients = threading.local()
+
+MAX_TRANSCRIPT_TOKENS = 2000  # Conservative limit
+
+_VALID_DOMAINS = frozenset(
+    ["youtube.com", "youtu.be", "www.youtube.com", "m.youtube.com"]
+)
+_VIDEO_URL_RE = re.compile(
+    r"(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/embed/|youtube\.com/v/)"
+    r"([a-zA-Z0-9_-]{11})"
+)
+_VIDEO_ID_RE = re.compile(r"^[a-zA-Z0-9_-]{11}$")
+# Output files must stay under the directory the tool was started from
+_CWD = Path.cwd().resolve()
+_FILENAME_TABLE = str.maketrans({char: "_" for char in '<>:"|?*\x00'})
+# Saves can run on several threads at once; one lock per output path keeps
+# two writers from interleaving their bytes in the same file.
+_SAVE_LOCKS = {}
+_SAVE_LOCKS_GUARD = threading.Lock()
+
+SUMMARY_INSTRUCTIONS = (
+    "Please provide a summary of the YouTube video transcript that follows. "
+    "Focus on the main points, key insights, and actionable takeaways. "
+    "Please format your response as a clear, well-structured summary.\n\n"
+    "Transcript:\n"
+)
+
+
+def _get_litellm():
+    """Import litellm the first time it is needed and reuse it afterwards."""
+    global _litellm
+    if _litellm is None:
+        import litellm
+
+        _litellm = litellm
+    return _litellm
 
 
 def extract_video_id(url):
@@ -25,42 +83,41 @@ def extract_video_id(url):
     url = url.strip()
 
     # Check for valid YouTube domains
-    valid_domains = ["youtube.com", "youtu.be", "www.youtube.com", "m.youtube.com"]
-
     try:
         parsed_url = urlparse(url)
-        if parsed_url.netloc and parsed_url.netloc not in valid_domains:
+        if parsed_url.netloc and parsed_url.netloc not in _VALID_DOMAINS:
             # If it has a domain but not YouTube, reject it
             if "." in parsed_url.netloc:
                 return None
     except Exception:
         pass
 
-    patterns = [
-        r"(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/embed/)([a-zA-Z0-9_-]{11})",
-        r"youtube\.com/v/([a-zA-Z0-9_-]{11})",
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            video_id = match.group(1)
-            # Additional validation for video ID format
-            if re.match(r"^[a-zA-Z0-9_-]{11}$", video_id):
-                return video_id
+    # The capture group only matches well-formed IDs, so no re-validation is needed
+    match = _VIDEO_URL_RE.search(url)
+    if match:
+        return match.group(1)
 
     # If it's already just a video ID, validate it strictly
-    if re.match(r"^[a-zA-Z0-9_-]{11}$", url):
+    if _VIDEO_ID_RE.match(url):
         return url
 
     return None
 
 
+def _get_transcript_api():
+    """Return this thread's transcript client, creating it on first use."""
+    api = getattr(_transcript_clients, "api", None)
+    if api is None:
+        api = YouTubeTranscriptApi(http_client=requests.Session())
+        _transcript_clients.api = api
+    return api
+
+
 def get_transcript(video_id):
     """Download transcript for a YouTube video."""
     try:
-        transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
-        transcript_text = " ".join([item["text"] for item in transcript_list])
+        transcript_list = _get_transcript_api().fetch(video_id).to_raw_data()
+        transcript_text = " ".join(map(itemgetter("text"), transcript_list))
         return transcript_text
     except Exception:
         print(
@@ -69,33 +126,204 @@ def get_transcript(video_id):
         return None
 
 
-def generate_summary(transcript, model="claude-sonnet-4-20250514"):
-    """Generate summary using LiteLLM."""
+def _summary_cache_key(transcript, model):
+    """Build the cache key for a transcript/model pair (whitespace-insensitive)."""
+    normalized = " ".join(transcript.split())
+    # The prompt and truncation limit are part of the key so changing either
+    # stops older summaries from being served.
+    template = f"{SUMMARY_INSTRUCTIONS}\0{MAX_TRANSCRIPT_TOKENS}"
+    return hashlib.sha256(
+        f"{template}\0{model}\0{normalized}".encode("utf-8")
+    ).hexdigest()
+
+
+def _open_summary_cache():
+    """Open the summary cache database, creating it if needed."""
+    SUMMARY_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(SUMMARY_CACHE_PATH, timeout=5)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS summaries "
+        "(key TEXT PRIMARY KEY, summary TEXT NOT NULL, created REAL NOT NULL)"
+    )
+    return conn
+
+
+def get_cached_summary(key):
+    """Return a previously generated summary for a cache key, if any."""
+    try:
+        conn = _open_summary_cache()
+        try:
+            row = conn.execute(
+                "SELECT summary FROM summaries WHERE key = ? AND created > ?",
+                (key, time.time() - SUMMARY_CACHE_TTL),
+            ).fetchone()
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError):
+        return None
+    return row[0] if row else None
+
+
+def cache_summary(key, summary):
+    """Store a generated summary in the cache. Failures are ignored."""
+    try:
+        conn = _open_summary_cache()
+        try:
+            now = time.time()
+            with conn:
+                conn.execute(
+                    "DELETE FROM summaries WHERE created <= ?",
+                    (now - SUMMARY_CACHE_TTL,),
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO summaries (key, summary, created) VALUES (?, ?, ?)",
+                    (key, summary, now),
+                )
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError):
+        pass
+
+
+def _truncate_transcript(transcript, model):
+    """Trim a transcript to at most MAX_TRANSCRIPT_TOKENS tokens for the model."""
+    # Cap tokenizer work on very long transcripts; this prefix still holds
+    # far more than MAX_TRANSCRIPT_TOKENS tokens of ordinary text.
+    transcript = transcript[: MAX_TRANSCRIPT_TOKENS * 10]
+    try:
+        litellm = _get_litellm()
+        tokens = litellm.encode(model=model, text=transcript)
+        token_ids = getattr(tokens, "ids", tokens)
+        if len(token_ids) <= MAX_TRANSCRIPT_TOKENS:
+            return transcript
+        return litellm.decode(model=model, tokens=token_ids[:MAX_TRANSCRIPT_TOKENS])
+    except Exception:
+        # No tokenizer for this model; fall back to ~4 characters per token
+        return transcript[: MAX_TRANSCRIPT_TOKENS * 4]
+
+
+def _summary_messages(transcript, model):
+    """Build the chat messages asking the LLM to summarize a transcript."""
+    # Truncate transcript if too long to prevent token limit issues
+    transcript = _truncate_transcript(transcript, model)
+
+    # Instructions come first and are marked cacheable; the transcript is the
+    # variable suffix so the prefix stays byte-identical across calls.
+    # Anthropic only caches prefixes of at least 1024 tokens (Sonnet/Opus), so
+    # the marker is a no-op until SUMMARY_INSTRUCTIONS grows to that size.
+    return [
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "text",
+                    "text": SUMMARY_INSTRUCTIONS,
+                    "cache_control": {"type": "ephemeral"},
+                },
+                {"type": "text", "text": transcript},
+            ],
+        }
+    ]
+
+
+def generate_summary(
+    transcript, model="claude-sonnet-4-20250514", use_cache=True, on_token=None
+):
+    """Generate summary using LiteLLM.
+
+    If on_token is given, the response is streamed and on_token is called
+    with each piece of text as it arrives.
+    """
+    cache_key = _summary_cache_key(transcript, model) if use_cache else None
+    if cache_key:
+        cached = get_cached_summary(cache_key)
+        if cached:
+            if on_token:
+                on_token(cached)
+            return cached
+
     try:
-        # Truncate transcript if too long to prevent token limit issues
-        max_transcript_length = 8000  # Conservative limit
-        if len(transcript) > max_transcript_length:
-            transcript = transcript[:max_transcript_length] + "..."
-
-        prompt = f"""Please provide a summary of this YouTube video transcript. 
-        Focus on the main points, key insights, and actionable takeaways.
-        
-        Transcript:
-        {transcript}
-        
-        Please format your response as a clear, well-structured summary."""
-
-        response = completion(
-            model=model, messages=[{"role": "user", "content": prompt}], max_tokens=1000
+        response = _get_litellm().completion(
+            model=model,
+            messages=_summary_messages(transcript, model),
+            max_tokens=1000,
+            stream=on_token is not None,
         )
+        if on_token:
+            parts = []
+            for chunk in response:
+                text = chunk.choices[0].delta.content
+                if text:
+                    parts.append(text)
+                    on_token(text)
+            summary = "".join(parts)
+        else:
+            summary = response.choices[0].message.content
+    except Exception:
+        print(
+            "Error: Unable to generate summary. Please check your API configuration and try again."
+        )
+        return None
+
+    if cache_key and summary:
+        cache_summary(cache_key, summary)
+    return summary
+
 
-        return response.choices[0].message.content
+async def agenerate_summary(
+    transcript, model="claude-sonnet-4-20250514", use_cache=True, on_token=None
+):
+    """Generate summary using LiteLLM without blocking the event loop.
+
+    If on_token is given, the response is streamed and on_token is called
+    with each piece of text as it arrives.
+    """
+    loop = asyncio.get_running_loop()
+
+    # Hashing, the SQLite cache, tokenizing and the first litellm import all
+    # block, so they run in the default executor rather than on the loop.
+    cache_key = None
+    if use_cache:
+        cache_key = await loop.run_in_executor(
+            None, _summary_cache_key, transcript, model
+        )
+        cached = await loop.run_in_executor(None, get_cached_summary, cache_key)
+        if cached:
+            if on_token:
+                on_token(cached)
+            return cached
+
+    try:
+        litellm = await loop.run_in_executor(None, _get_litellm)
+        messages = await loop.run_in_executor(
+            None, _summary_messages, transcript, model
+        )
+        response = await litellm.acompletion(
+            model=model,
+            messages=messages,
+            max_tokens=1000,
+            stream=on_token is not None,
+        )
+        if on_token:
+            parts = []
+            async for chunk in response:
+                text = chunk.choices[0].delta.content
+                if text:
+                    parts.append(text)
+                    on_token(text)
+            summary = "".join(parts)
+        else:
+            summary = response.choices[0].message.content
     except Exception:
         print(
             "Error: Unable to generate summary. Please check your API configuration and try again."
         )
         return None
 
+    if cache_key and summary:
+        await loop.run_in_executor(None, cache_summary, cache_key, summary)
+    return summary
+
 
 def sanitize_filename(filename):
     """Sanitize filename to prevent directory traversal and other attacks."""
@@ -106,9 +334,7 @@ def sanitize_filename(filename):
     filename = os.path.basename(filename)
 
     # Remove or replace dangerous characters
-    dangerous_chars = ["<", ">", ":", '"', "|", "?", "*", "\x00"]
-    for char in dangerous_chars:
-        filename = filename.replace(char, "_")
+    filename = filename.translate(_FILENAME_TABLE)
 
     # Ensure it ends with .md
     if not filename.endswith(".md"):
@@ -122,23 +348,30 @@ def sanitize_filename(filename):
     return filename
 
 
+def _save_lock(path):
+    """Return the lock that serializes writes to an output path."""
+    with _SAVE_LOCKS_GUARD:
+        return _SAVE_LOCKS.setdefault(path, threading.Lock())
+
+
 def save_to_markdown(transcript, summary, output_file, video_url, model_name=None):
     """Save transcript and summary to markdown file."""
     # Sanitize the output filename
     safe_filename = sanitize_filename(output_file)
 
     # Ensure we're writing to current directory or subdirectory only
-    safe_path = Path(safe_filename).resolve()
-    current_dir = Path.cwd().resolve()
+    safe_path = (_CWD / safe_filename).resolve()
 
     try:
         # Check if the resolved path is within current directory
-        safe_path.relative_to(current_dir)
+        safe_path.relative_to(_CWD)
     except ValueError:
         print("Error: Output file must be in current directory")
         return False
 
-    content = f"""# YouTube Video Summary
+    # The transcript is written separately so it is never copied into a
+    # second, combined string.
+    header = f"""# YouTube Video Summary
 
 **Video URL:** {video_url}
 
@@ -150,12 +383,13 @@ def save_to_markdown(transcript, summary, output_file, video_url, model_name=Non
 
 ## Full Transcript
 
-{transcript}
 """
 
     try:
-        with open(safe_path, "w", encoding="utf-8") as f:
-            f.write(content)
+        with _save_lock(safe_path), open(safe_path, "w", encoding="utf-8") as f:
+            f.write(header)
+            f.write(transcript)
+            f.write("\n")
 
         print(f"Summary and transcript saved to: {safe_path}")
         return True
@@ -164,6 +398,80 @@ def save_to_markdown(transcript, summary, output_file, video_url, model_name=Non
         return False
 
 
+async def save_to_markdown_async(
+    transcript, summary, output_file, video_url, model_name=None
+):
+    """Save transcript and summary to markdown file without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None, save_to_markdown, transcript, summary, output_file, video_url, model_name
+    )
+
+
+class _LineSerializedStream:
+    """Text stream wrapper that writes whole lines, so threads never interleave."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._lock = threading.Lock()
+        self._pending = threading.local()
+
+    def write(self, text):
+        # Hold each thread's partial line until its newline arrives
+        buffered = getattr(self._pending, "text", "") + text
+        lines, newline, rest = buffered.rpartition("\n")
+        self._pending.text = rest
+        if newline:
+            with self._lock:
+                self._stream.write(lines + newline)
+        return len(text)
+
+    def flush(self):
+        with self._lock:
+            self._stream.flush()
+
+
+def process_url(url, output_file, model, use_cache=True, stream=False):
+    """Download, summarize and save a single video. Returns True on success."""
+    # Extract video ID
+    video_id = extract_video_id(url)
+    if not video_id:
+        print(f"Error: Invalid YouTube URL or video ID: {url}")
+        return False
+
+    print(f"Video ID: {video_id}")
+
+    # Download transcript
+    print(f"Downloading transcript for {video_id}...")
+    transcript = get_transcript(video_id)
+    if not transcript:
+        print(f"Failed to download transcript for {video_id}")
+        return False
+
+    print(f"Transcript downloaded successfully for {video_id}")
+
+    # Generate summary
+    print(f"Generating summary for {video_id} using {model}...")
+    summary = generate_summary(
+        transcript,
+        model,
+        use_cache=use_cache,
+        on_token=(lambda text: print(text, end="", flush=True)) if stream else None,
+    )
+    if stream:
+        print()
+    if not summary:
+        print(f"Failed to generate summary for {video_id}")
+        return False
+
+    print(f"Summary generated successfully for {video_id}")
+
+    # Save to markdown
+    return save_to_markdown(
+        transcript, summary, output_file or f"{video_id}.md", url, model
+    )
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Download YouTube video transcripts and generate AI summaries",
@@ -173,16 +481,19 @@ Examples:
   %(prog)s https://www.youtube.com/watch?v=dQw4w9WgXcQ
   %(prog)s -o summary.md -m gpt-4 https://youtu.be/dQw4w9WgXcQ
   %(prog)s --model claude-3-opus-20240229 https://www.youtube.com/watch?v=dQw4w9WgXcQ
+  %(prog)s --concurrency 4 https://youtu.be/dQw4w9WgXcQ https://youtu.be/9bZkp7q19f0
         """,
     )
 
-    parser.add_argument("url", nargs="?", help="YouTube video URL or video ID")
+    parser.add_argument(
+        "urls", nargs="*", metavar="url", help="YouTube video URLs or video IDs"
+    )
 
     parser.add_argument(
         "-o",
         "--output",
-        default="transcript.md",
-        help="Output markdown file (default: transcript.md)",
+        help="Output markdown file for a single URL (default: transcript.md). "
+        "With several URLs each video is saved as VIDEO_ID.md",
     )
 
     parser.add_argument(
@@ -192,45 +503,72 @@ Examples:
         help="LLM model to use for summary (default: claude-sonnet-4-20250514)",
     )
 
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the LLM instead of reusing a cached summary",
+    )
+
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Number of videos to process at once when given several URLs (default: 4)",
+    )
+
     args = parser.parse_args()
 
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.output and len(args.urls) > 1:
+        parser.error("--output can only be used with a single URL")
+
     # Get URL from command line or prompt user
-    url = args.url
-    if not url:
+    urls = args.urls
+    if not urls:
         url = input("Enter YouTube video URL: ").strip()
+        urls = [url] if url else []
 
-    if not url:
+    if not urls:
         print("Error: No YouTube URL provided")
         sys.exit(1)
 
-    # Extract video ID
-    video_id = extract_video_id(url)
-    if not video_id:
-        print("Error: Invalid YouTube URL or video ID")
-        sys.exit(1)
-
-    print(f"Video ID: {video_id}")
-
-    # Download transcript
-    print("Downloading transcript...")
-    transcript = get_transcript(video_id)
-    if not transcript:
-        print("Failed to download transcript")
-        sys.exit(1)
-
-    print("Transcript downloaded successfully")
-
-    # Generate summary
-    print(f"Generating summary using {args.model}...")
-    summary = generate_summary(transcript, args.model)
-    if not summary:
-        print("Failed to generate summary")
-        sys.exit(1)
-
-    print("Summary generated successfully")
-
-    # Save to markdown
-    if not save_to_markdown(transcript, summary, args.output, url, args.model):
+    use_cache = not args.no_cache
+
+    if len(urls) == 1:
+        output_file = args.output or "transcript.md"
+        if not process_url(urls[0], output_file, args.model, use_cache, stream=True):
+            sys.exit(1)
+        return
+
+    # Each video is saved as VIDEO_ID.md, so keep only the first URL per video;
+    # a repeat would just redo the work and race on the same file.
+    seen = set()
+    unique_urls = []
+    for url in urls:
+        video_id = extract_video_id(url)
+        if video_id in seen:
+            continue
+        if video_id:
+            seen.add(video_id)
+        unique_urls.append(url)
+    urls = unique_urls
+
+    # Videos are independent and mostly waiting on the network, so threads overlap
+    # them; the pool size also caps concurrent requests to the LLM provider.
+    with contextlib.redirect_stdout(_LineSerializedStream(sys.stdout)):
+        with ThreadPoolExecutor(
+            max_workers=min(args.concurrency, len(urls))
+        ) as executor:
+            results = list(
+                executor.map(
+                    lambda url: process_url(url, None, args.model, use_cache), urls
+                )
+            )
+
+    print(f"Processed {sum(results)} of {len(urls)} videos successfully")
+    if not all(results):
         sys.exit(1)
 
 
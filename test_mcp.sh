@@ -179,6 +179,7 @@ echo "      - url (required): YouTube video URL or video ID"
 echo "      - model (optional): LLM model to use for summary"
 echo "      - output_file (optional): Output markdown file path"
 echo "      - save_to_file (optional): Whether to save results to file"
+echo "      - use_cache (optional): Reuse a cached summary for the same transcript and model"
 
 echo
 print_status "To test with a real YouTube video, set your API keys and run:"